@@ -1,9 +1,49 @@
 import logging
-import psycopg2
 import threading
-from typing import List, Optional
-from psycopg2.extras import RealDictCursor
-from psycopg2 import pool
+import time
+from contextlib import contextmanager
+from typing import List, Optional, Tuple
+import psycopg
+from psycopg.conninfo import make_conninfo
+from psycopg.rows import dict_row
+from psycopg_pool import ConnectionPool
+
+# Channel notified by the trigger on upload_to_s3, see README
+NEW_UPLOAD_CHANNEL = "new_upload"
+
+# Pending rows not locked by another worker, oldest first
+_FETCH_PENDING_QUERY = """
+    SELECT
+        id,
+        image_id,
+        acq_id,
+        path AS local_path
+    FROM upload_to_s3
+    WHERE retry_count < 5
+    ORDER BY id
+    LIMIT %s
+    FOR UPDATE SKIP LOCKED
+"""
+
+# Marks many rows as failed in one statement; params are (ids, error messages) as two arrays
+_MARK_BATCH_FAILED_QUERY = """
+    UPDATE upload_to_s3
+    SET status = 'failed',
+        last_error = data.err,
+        retry_count = retry_count + 1
+    FROM unnest(%s::bigint[], %s::text[]) AS data(id, err)
+    WHERE upload_to_s3.id = data.id
+"""
+
+# Records an object in uploaded_s3 unless it is already there; params are
+# (image_id, acq_id, path, object_key, bucket, bucket, object_key)
+_INSERT_UPLOADED_IF_MISSING_QUERY = """
+    INSERT INTO uploaded_s3 (image_id, acq_id, path, object_key, bucket)
+    SELECT %s, %s, %s, %s, %s
+    WHERE NOT EXISTS (
+        SELECT 1 FROM uploaded_s3 WHERE bucket = %s AND object_key = %s
+    )
+"""
 
 class Database:
     _instance = None
@@ -11,6 +51,8 @@ class Database:
 
     def __init__(self):
         self.connection_pool = None
+        self._conninfo = None
+        self._listen_conn = None
 
     @staticmethod
     def get_instance():
@@ -20,64 +62,128 @@ class Database:
                     Database._instance = Database()
         return Database._instance
 
-    def initialize_connection_pool(self, user: str, password: str, host: str, port: str, database: str):
+    def initialize_connection_pool(self, user: str, password: str, host: str, port: str, database: str,
+                                   max_size: int = 2):
         """
         Initializes the PostgreSQL connection pool.
+        Upload workers never touch the DB; only the batch coordinator does, through the
+        one connection holding its claim. The pool keeps that connection open and allows
+        `max_size` in total, leaving headroom for one-off queries.
+        The LISTEN connection is separate and not taken from the pool.
         """
         try:
-            self.connection_pool = pool.ThreadedConnectionPool(
-                1, 20,
-                user=user,
-                password=password,
-                host=host,
-                port=port,
-                database=database
+            conninfo = make_conninfo(user=user, password=password, host=host, port=port, dbname=database)
+            self._conninfo = conninfo
+            self.connection_pool = ConnectionPool(
+                conninfo,
+                min_size=1,
+                max_size=max_size,
+                kwargs={"autocommit": False},
+                open=True
             )
-            logging.info("Database connection pool initialized.")
+            logging.info(f"Database connection pool initialized (min_size=1, max_size={max_size}).")
         except Exception as e:
             logging.exception("Failed to initialize database connection pool.")
             raise e
 
-    def get_connection(self):
+    def close_all_connections(self):
+        if self._listen_conn is not None:
+            self._listen_conn.close()
+            self._listen_conn = None
         if self.connection_pool:
-            return self.connection_pool.getconn()
-        else:
-            raise Exception("Connection pool is not initialized.")
+            self.connection_pool.close()
 
-    def release_connection(self, conn):
-        if self.connection_pool:
-            self.connection_pool.putconn(conn)
+    def wait_for_new_uploads(self, timeout: float) -> bool:
+        """
+        Block until a row is inserted into 'upload_to_s3' (via LISTEN/NOTIFY) or
+        'timeout' seconds pass. Returns True if woken by a notification.
+        The listener is a dedicated autocommit connection outside the pool, opened
+        on first use. If listening fails we fall back to sleeping for 'timeout'.
+        """
+        try:
+            if self._listen_conn is None or self._listen_conn.closed:
+                self._listen_conn = psycopg.connect(self._conninfo, autocommit=True)
+                self._listen_conn.execute(f"LISTEN {NEW_UPLOAD_CHANNEL}")
+                logging.info(f"Listening for notifications on '{NEW_UPLOAD_CHANNEL}'.")
 
-    def close_all_connections(self):
-        if self.connection_pool:
-            self.connection_pool.closeall()
+            notified = False
+            for _ in self._listen_conn.notifies(timeout=timeout, stop_after=1):
+                notified = True
+            if notified:
+                # Drain the rest of a burst of inserts; one fetch picks them all up
+                for _ in self._listen_conn.notifies(timeout=0):
+                    pass
+            return notified
+        except Exception as e:
+            logging.warning(f"LISTEN on '{NEW_UPLOAD_CHANNEL}' failed, sleeping instead: {e}")
+            if self._listen_conn is not None:
+                self._listen_conn.close()
+                self._listen_conn = None
+            time.sleep(timeout)
+            return False
+
+    @contextmanager
+    def connection(self, conn=None):
+        """
+        Yields a pooled connection. The transaction is committed when the block
+        exits normally and rolled back if it raises.
+        If 'conn' is given it is yielded as-is and its owner (e.g. claim_pending_uploads)
+        decides when to commit.
+        """
+        if conn is not None:
+            yield conn
+            return
+        if not self.connection_pool:
+            raise Exception("Connection pool is not initialized.")
+        with self.connection_pool.connection() as pooled_conn:
+            yield pooled_conn
 
     def execute_query(self, query: str, params: Optional[tuple] = None,
-                      commit: bool = False, fetch: bool = True):
+                      commit: bool = False, fetch: bool = True, conn=None):
         """
         A helper method to execute SQL queries.
+        Runs inside the transaction of 'conn' when given, without committing it.
         """
-        conn = self.get_connection()
         try:
-            with conn.cursor(cursor_factory=RealDictCursor) as cursor:
+            with self.connection(conn) as active_conn, active_conn.cursor(row_factory=dict_row) as cursor:
                 cursor.execute(query, params)
-                if commit:
-                    conn.commit()
+                if commit and conn is None:
+                    active_conn.commit()
                 if fetch:
                     return cursor.fetchall()
                 else:
                     return None
         except Exception as e:
             logging.exception("Failed to execute query.")
-            conn.rollback()
             raise e
-        finally:
-            self.release_connection(conn)
 
     def fetch_pending_uploads(self, limit: int = 50):
         """
         Fetch rows from 'upload_to_s3' that have status='pending' and retry_count < 5.
-        Returns up to 'limit' rows.
+        Returns up to 'limit' rows, skipping rows locked by another worker.
+        The locks end with this query; use claim_pending_uploads to hold them for a batch.
+        """
+        return self.execute_query(_FETCH_PENDING_QUERY, params=(limit,))
+
+    @contextmanager
+    def claim_pending_uploads(self, limit: int = 50):
+        """
+        Claim up to 'limit' pending rows for the duration of the block.
+        The rows stay locked (FOR UPDATE SKIP LOCKED) until the block exits, so
+        other workers and hosts skip them while this batch is being uploaded.
+        Yields (conn, rows); pass 'conn' to the bookkeeping methods so their
+        writes join the claiming transaction, which commits when the block exits.
+        """
+        with self.connection() as conn:
+            with conn.cursor(row_factory=dict_row) as cursor:
+                cursor.execute(_FETCH_PENDING_QUERY, (limit,))
+                rows = cursor.fetchall()
+            yield conn, rows
+
+    def fetch_pending_uploads_single_image(self, path: str):
+        """
+        Fetch the pending 'upload_to_s3' row for a single local path, or None.
+        Relies on the index on upload_to_s3(path), see README.
         """
         query_fetch = """
             SELECT
@@ -86,24 +192,17 @@ class Database:
                 acq_id,
                 path AS local_path
             FROM upload_to_s3
-            WHERE retry_count < 5
-            LIMIT %s
+            WHERE path = %s
+              AND retry_count < 5
+            LIMIT 1
         """
-        return self.execute_query(query_fetch, params=(limit,))
-
-    def fetch_pending_uploads_single_image(self, path: str):
-        pending_images = self.fetch_pending_uploads()
-        if not pending_images:
-            logging.info("No pending images to upload.")
-            return
-
-        for record in pending_images:
-            if record['local_path'] == path:
-                return record
-
-        return
+        rows = self.execute_query(query_fetch, params=(path,))
+        if not rows:
+            logging.info(f"No pending upload found for {path}.")
+            return None
+        return rows[0]
 
-    def delete_uploaded_record(self, upload_id: int):
+    def delete_uploaded_record(self, upload_id: int, conn=None):
         """
         Delete a record from 'upload_to_s3' after a successful upload.
         """
@@ -111,10 +210,23 @@ class Database:
             DELETE FROM upload_to_s3
             WHERE id = %s
         """
-        self.execute_query(query_delete, params=(upload_id,), commit=True, fetch=False)
+        self.execute_query(query_delete, params=(upload_id,), commit=True, fetch=False, conn=conn)
         logging.info(f"Deleted record with ID {upload_id} from 'upload_to_s3'.")
 
-    def mark_as_failed(self, upload_id: int, error_msg: str):
+    def batch_delete(self, upload_ids: List[int], conn=None):
+        """
+        Batch version of delete_uploaded_record: one DELETE for all IDs.
+        """
+        if not upload_ids:
+            return
+        query_delete = """
+            DELETE FROM upload_to_s3
+            WHERE id = ANY(%s)
+        """
+        self.execute_query(query_delete, params=(list(upload_ids),), commit=True, fetch=False, conn=conn)
+        logging.info(f"Deleted {len(upload_ids)} records from 'upload_to_s3'.")
+
+    def mark_as_failed(self, upload_id: int, error_msg: str, conn=None):
         """
         Update a record to 'failed' status, store the last error message,
         and increment the retry_count column by 1.
@@ -126,10 +238,25 @@ class Database:
                 retry_count = retry_count + 1
             WHERE id = %s
         """
-        self.execute_query(query_update, params=(error_msg, upload_id), commit=True, fetch=False)
+        self.execute_query(query_update, params=(error_msg, upload_id), commit=True, fetch=False, conn=conn)
         logging.info(f"Marked upload ID {upload_id} as 'failed' (incremented retry_count), error: {error_msg}")
 
-    def insert_into_uploaded_s3(self, image_id: int, acq_id: int, local_path: str, s3_path: str, bucket_name: str):
+    def batch_mark_failed(self, pairs: List[Tuple[int, str]], conn=None):
+        """
+        Batch version of mark_as_failed: one UPDATE for all (upload_id, error_msg) pairs.
+        """
+        if not pairs:
+            return
+        self.execute_query(_MARK_BATCH_FAILED_QUERY, params=self._unzip_failed(pairs), commit=True, fetch=False,
+                           conn=conn)
+        logging.info(f"Marked {len(pairs)} uploads as 'failed' (incremented retry_count).")
+
+    @staticmethod
+    def _unzip_failed(pairs: List[Tuple[int, str]]) -> Tuple[List[int], List[str]]:
+        return [upload_id for upload_id, _ in pairs], [error_msg for _, error_msg in pairs]
+
+    def insert_into_uploaded_s3(self, image_id: int, acq_id: int, local_path: str, s3_path: str, bucket_name: str,
+                                conn=None):
         """
         Insert a record into 'uploaded_s3' to keep track of successful S3 uploads.
         """
@@ -138,9 +265,46 @@ class Database:
             VALUES (%s, %s, %s, %s, %s)
         """
         params = [image_id, acq_id, local_path, s3_path, bucket_name]
-        self.execute_query(query, params=params, commit=True, fetch=False)
+        self.execute_query(query, params=params, commit=True, fetch=False, conn=conn)
         logging.info(f"Inserted record into 'uploaded_s3' for local_path={local_path}")
 
+    def batch_insert_uploaded_s3(self, rows: List[Tuple[int, int, str, str, str]], conn=None):
+        """
+        Batch version of insert_into_uploaded_s3.
+        Each row is (image_id, acq_id, local_path, s3_path, bucket_name).
+        """
+        if not rows:
+            return
+        query = """
+            INSERT INTO uploaded_s3 (image_id, acq_id, path, object_key, bucket)
+            VALUES (%s, %s, %s, %s, %s)
+        """
+        try:
+            with self.connection(conn) as active_conn, active_conn.cursor() as cursor:
+                cursor.executemany(query, rows)
+        except Exception as e:
+            logging.exception("Failed to insert batch into 'uploaded_s3'.")
+            raise e
+        logging.info(f"Inserted {len(rows)} records into 'uploaded_s3'.")
+
+    def batch_insert_uploaded_s3_if_missing(self, rows: List[Tuple[int, int, str, str, str]], conn=None):
+        """
+        Like batch_insert_uploaded_s3, but skips objects that already have an
+        'uploaded_s3' row. Used for rows whose object was found in S3, e.g. uploaded
+        by a batch whose bookkeeping was rolled back. Relies on the index on
+        uploaded_s3(object_key), see README.
+        """
+        if not rows:
+            return
+        params = [(image_id, acq_id, path, key, bucket, bucket, key) for image_id, acq_id, path, key, bucket in rows]
+        try:
+            with self.connection(conn) as active_conn, active_conn.cursor() as cursor:
+                cursor.executemany(_INSERT_UPLOADED_IF_MISSING_QUERY, params)
+        except Exception as e:
+            logging.exception("Failed to insert missing rows into 'uploaded_s3'.")
+            raise e
+        logging.info(f"Ensured {len(rows)} already-present objects are recorded in 'uploaded_s3'.")
+
     def delete_image_from_imagedb(self, path: int):
         """
         Delete a record from 'images' for debugging purposes
@@ -1,9 +1,13 @@
 import os
-import json
 import logging
 from typing import Optional
 
 import requests
+from requests.adapters import HTTPAdapter
+
+# Shared session so repeated notifications reuse the same keep-alive TLS connection
+_SLACK_SESSION = requests.Session()
+_SLACK_SESSION.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=4))
 
 
 def _get_webhook_url() -> Optional[str]:
@@ -28,12 +32,7 @@ def send_error_to_slack(error_message: str, title: str = "Error") -> None:
     payload = {"text": f"*{title}*\n{error_message}"}
 
     try:
-        response = requests.post(
-            webhook_url,
-            data=json.dumps(payload),
-            headers={"Content-Type": "application/json"},
-            timeout=5,
-        )
+        response = _SLACK_SESSION.post(webhook_url, json=payload, timeout=5)
         if response.status_code != 200 or response.text.strip() != "ok":
             logging.warning(
                 "Failed to send message to Slack. status=%s response=%r",
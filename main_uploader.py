@@ -44,6 +44,9 @@ def main():
     # S3 configuration
     s3_config = {
         'endpoint_url': os.getenv('ENDPOINT_URL'),
+        'use_accelerate': os.getenv('S3_USE_ACCELERATE', '').lower() in ('1', 'true', 'yes'),
+        # e.g. CRC32C; leave unset for S3-compatible stores without flexible checksum support
+        'checksum_algorithm': os.getenv('S3_CHECKSUM_ALGORITHM') or None,
     }
 
     # Initialize the uploader
@@ -1,25 +1,62 @@
 import os
 import datetime
+import logging
+import time
 import boto3
 from botocore.exceptions import ClientError
 from botocore.client import BaseClient
+from botocore.config import Config
 import threading
 from typing import Optional, List
 import configparser
 
 class S3ClientWrapper:
     BUFFER_PERIOD_MINUTES: int = 10
+    # Without an expiry (static, env or instance credentials) the client is kept and the
+    # credentials file is only re-checked for changes this often
+    STATIC_CREDENTIALS_RECHECK_SECONDS: int = 300
 
-    def __init__(self, endpoint_url: str, region: Optional[str] = None) -> None:
+    def __init__(self, endpoint_url: str, region: Optional[str] = None,
+                 use_accelerate: bool = False, max_pool_connections: int = 10,
+                 unsigned_payload: bool = False, config: Optional[Config] = None) -> None:
         self.endpoint_url: str = endpoint_url
         self.region: Optional[str] = region
+        # Transfer Acceleration only exists on AWS S3 and needs virtual-hosted addressing
+        self.use_accelerate: bool = use_accelerate
+        self.max_pool_connections: int = max_pool_connections
+        # Skip SHA-256 payload signing; only safe when uploads carry their own checksum
+        self.unsigned_payload: bool = unsigned_payload
+        # Extra botocore settings (timeouts, keep-alive, ...) merged over the defaults below
+        self.config: Optional[Config] = config
         self._lock: threading.Lock = threading.Lock()
         self._s3_client: Optional[BaseClient] = None
         self._expiry_time: Optional[datetime.datetime] = None
+        # Epoch seconds until which _s3_client can be handed out without taking the lock.
+        # Without an expiry it is pushed STATIC_CREDENTIALS_RECHECK_SECONDS ahead instead.
+        self._refresh_deadline: float = 0.0
+        # Parsed expiry of ~/.aws/credentials, reused until the file's mtime changes
+        self._cred_mtime: Optional[float] = None
+        self._cached_expiry: Optional[datetime.datetime] = None
         self._refresh_s3_client(force_refresh=True)
 
+    @staticmethod
+    def _aws_credentials_mtime() -> Optional[float]:
+        try:
+            return os.stat(os.path.expanduser('~/.aws/credentials')).st_mtime
+        except OSError:
+            return None
+
     def _read_aws_credentials_expiry(self) -> Optional[datetime.datetime]:
         aws_credentials_path = os.path.expanduser('~/.aws/credentials')
+        mtime = self._aws_credentials_mtime()
+        if mtime is not None and mtime == self._cred_mtime:
+            return self._cached_expiry
+
+        self._cached_expiry = self._parse_aws_credentials_expiry(aws_credentials_path)
+        self._cred_mtime = mtime
+        return self._cached_expiry
+
+    def _parse_aws_credentials_expiry(self, aws_credentials_path: str) -> Optional[datetime.datetime]:
         config = configparser.ConfigParser()
         try:
             config.read(aws_credentials_path)
@@ -42,29 +79,56 @@ class S3ClientWrapper:
                     dt = dt.replace(tzinfo=datetime.timezone.utc)
                 return dt.astimezone(datetime.timezone.utc)
         except Exception as e:
-            print(f"Error reading expiration from AWS credentials: {e}")
+            logging.warning(f"Error reading expiration from AWS credentials: {e}")
         return None
 
     def _create_s3_client(self) -> Optional[BaseClient]:
         try:
             session = boto3.session.Session()
-            client = session.client('s3', endpoint_url=self.endpoint_url, region_name=self.region)
+            s3_options = {"use_accelerate_endpoint": True, "addressing_style": "virtual"} if self.use_accelerate else {}
+            if self.unsigned_payload:
+                s3_options["payload_signing_enabled"] = False
+            config = Config(
+                s3=s3_options,
+                max_pool_connections=self.max_pool_connections,
+                retries={"mode": "adaptive", "max_attempts": 5}
+            )
+            if self.config is not None:
+                config = config.merge(self.config)
+            client = session.client('s3', endpoint_url=self.endpoint_url, region_name=self.region, config=config)
             self._expiry_time = self._read_aws_credentials_expiry()  # Update expiry time upon client creation
-            print(f"New client created, expiration time refreshed: {self._expiry_time}")
+            logging.debug(f"New client created, expiration time refreshed: {self._expiry_time}")
             return client
         except Exception as e:
-            print(f"Failed to create S3 client: {e}")
+            logging.exception(f"Failed to create S3 client: {e}")
             raise e
 
     def _refresh_s3_client(self, force_refresh: bool = False) -> None:
         with self._lock:
+            if not force_refresh and self._s3_client is not None and time.time() < self._refresh_deadline:
+                return  # Another thread refreshed it while we waited for the lock
+
             current_time = datetime.datetime.now(datetime.timezone.utc)
-            if force_refresh or not self._expiry_time or (self._expiry_time and current_time >= (self._expiry_time - datetime.timedelta(minutes=self.BUFFER_PERIOD_MINUTES))):
-                print("Refreshing S3 client due to credential expiry or forced refresh.")
+            buffer = datetime.timedelta(minutes=self.BUFFER_PERIOD_MINUTES)
+            if self._expiry_time:
+                needs_refresh = current_time >= (self._expiry_time - buffer)
+            else:
+                # No expiry to wait for: only rebuild if the credentials file was rewritten
+                needs_refresh = self._aws_credentials_mtime() != self._cred_mtime
+            if force_refresh or self._s3_client is None or needs_refresh:
+                logging.debug("Refreshing S3 client due to credential expiry/change or forced refresh.")
                 self._s3_client = self._create_s3_client()
             else:
-                print(f"No need Refreshing S3 client self._expiry_time={self._expiry_time}")
+                logging.debug(f"No need Refreshing S3 client self._expiry_time={self._expiry_time}")
+
+            if self._expiry_time:
+                self._refresh_deadline = (self._expiry_time - buffer).timestamp()
+            else:
+                self._refresh_deadline = time.time() + self.STATIC_CREDENTIALS_RECHECK_SECONDS
 
     def get_fresh_s3_client(self) -> Optional[BaseClient]:
+        # Fast path: no lock while the current client is known to be valid
+        if time.time() < self._refresh_deadline:
+            return self._s3_client
         self._refresh_s3_client()
         return self._s3_client
@@ -2,9 +2,14 @@ import os
 import logging
 import concurrent.futures
 import time
-from typing import List, Optional
+from dataclasses import dataclass
+from enum import Enum
+from typing import Dict, List, Optional, Tuple
 from database import Database
 from s3_client_wrapper import S3ClientWrapper
+from boto3.exceptions import S3UploadFailedError
+from boto3.s3.transfer import TransferConfig
+from botocore.compat import HAS_CRT
 from botocore.exceptions import ClientError
 from error_utils import send_error_to_slack
 import threading
@@ -28,10 +33,62 @@ def send_error_to_slack_rate_limited(message: str, title: str = "Error", min_int
         # Do not let Slack errors impact uploader; just swallow
         return False
 
+# How long a cached head_object result is trusted
+_HEAD_CACHE_TTL_SEC = 300
+_HEAD_CACHE_MAX_ENTRIES = 4096
+
+# How long a local file found missing is assumed to stay missing
+_MISSING_FILE_TTL_SEC = 60
+_MISSING_FILE_MAX_ENTRIES = 4096
+
+# Files at or above this size are uploaded as concurrent multipart uploads
+_MULTIPART_THRESHOLD_BYTES = 8 * 1024 * 1024
+
+# Python-level read buffer for single-part upload bodies. botocore hashes and
+# streams the body in its own chunk sizes; this only means each underlying file
+# read() fetches up to 1 MB, so small reads are served from memory
+_UPLOAD_READ_BUFFER_BYTES = 1024 * 1024
+
+# Checksums botocore can only compute through the optional awscrt package (boto3[crt])
+_CRT_CHECKSUM_ALGORITHMS = {'CRC32C', 'CRC64NVME'}
+
+BUCKET_NAME = 'mikro'
+
 class S3MeltdownError(Exception):
     """Raised when we detect an S3 meltdown/offline situation, to skip further uploads."""
     pass
 
+class UploadState(Enum):
+    SUCCESS = 'success'            # uploaded now
+    S3_EXISTS = 's3_exists'        # object was already in S3
+    MISSING_FILE = 'missing_file'  # local file does not exist
+    FAILED = 'failed'              # upload raised
+
+@dataclass
+class UploadOutcome:
+    """Result of one upload attempt, recorded in the DB later by the batch coordinator."""
+    upload_id: int
+    image_id: int
+    acq_id: int
+    local_path: str
+    s3_path: str
+    bucket: str
+    state: UploadState
+    error: Optional[str] = None
+
+    @classmethod
+    def from_record(cls, image_record: dict, state: UploadState, error: Optional[str] = None) -> 'UploadOutcome':
+        return cls(
+            upload_id=image_record['id'],
+            image_id=image_record['image_id'],
+            acq_id=image_record['acq_id'],
+            local_path=image_record['local_path'],
+            s3_path=image_record['local_path'].lstrip('/'),  # Remove any leading slashes
+            bucket=BUCKET_NAME,
+            state=state,
+            error=error
+        )
+
 class S3ImageUploader:
     def __init__(
         self,
@@ -39,15 +96,26 @@ class S3ImageUploader:
         s3_config: dict,
         max_workers: int = 3,
         meltdown_threshold: int = 5,
-        sleep_time: int = 30
+        sleep_time: int = 30,
+        head_workers: int = 16
     ):
         """
         :param db_config: Database configuration dict with user, password, host, port, database.
-        :param s3_config: S3 configuration dict with endpoint_url, optional region, etc.
+        :param s3_config: S3 configuration dict with endpoint_url, optional region, optional use_accelerate,
+            optional checksum_algorithm (e.g. 'CRC32C', needs awscrt), etc.
         :param max_workers: Max number of threads for concurrent uploads.
         :param meltdown_threshold: Number of meltdown-level errors tolerated before stopping.
-        :param sleep_time: Number of seconds to sleep when no pending images are found.
+        :param sleep_time: Max number of seconds to wait for new uploads when no pending images are found.
+        :param head_workers: Number of threads used to check S3 existence for a whole batch up front.
         """
+        # Fail at startup rather than on every upload (which would burn each row's retries)
+        checksum_algorithm = s3_config.get('checksum_algorithm')
+        if checksum_algorithm and checksum_algorithm.upper() in _CRT_CHECKSUM_ALGORITHMS and not HAS_CRT:
+            raise RuntimeError(
+                f"S3_CHECKSUM_ALGORITHM={checksum_algorithm} needs the awscrt package; "
+                f"install boto3[crt] (see requirements.txt) or unset S3_CHECKSUM_ALGORITHM."
+            )
+
         self.db = Database.get_instance()
         self.db.initialize_connection_pool(
             user=db_config['user'],
@@ -57,62 +125,131 @@ class S3ImageUploader:
             database=db_config['database']
         )
 
-        self.s3_client_wrapper = S3ClientWrapper(
-            endpoint_url=s3_config['endpoint_url'],
-            region=s3_config.get('region')
-        )
         self.max_workers = max_workers
+        self.head_workers = head_workers
         self.meltdown_threshold = meltdown_threshold
         self.consecutive_meltdown_errors = 0
         self.sleep_time = sleep_time  # <--- Sleep time now stored here
 
-    def upload_image(self, image_record: dict):
+        # Shared by all workers; each large upload sends up to max_concurrency parts at once
+        self._transfer_config = TransferConfig(
+            multipart_threshold=_MULTIPART_THRESHOLD_BYTES,
+            multipart_chunksize=_MULTIPART_THRESHOLD_BYTES,
+            max_concurrency=8,
+            use_threads=True
+        )
+
+        # When S3 validates a checksum of the body, the SHA-256 payload signature is redundant
+        self.checksum_algorithm = checksum_algorithm
+        self._upload_extra_args = {'ChecksumAlgorithm': self.checksum_algorithm} if self.checksum_algorithm else {}
+
+        # Every upload worker may have max_concurrency parts in flight, and the
+        # prefetch runs head_workers HEADs at once; size the urllib3 pool for both
+        self.s3_client_wrapper = S3ClientWrapper(
+            endpoint_url=s3_config['endpoint_url'],
+            region=s3_config.get('region'),
+            use_accelerate=s3_config.get('use_accelerate', False),
+            max_pool_connections=max(max_workers * self._transfer_config.max_concurrency, head_workers),
+            unsigned_payload=bool(self.checksum_algorithm)
+        )
+
+        # Long-lived worker pools, reused for every batch instead of being rebuilt per loop
+        self._pool = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="s3up")
+        self._head_pool = concurrent.futures.ThreadPoolExecutor(max_workers=head_workers, thread_name_prefix="s3head")
+
+        # (bucket, key) -> (exists, monotonic timestamp) of recent head_object/put_object results,
+        # in insertion (= timestamp) order so the oldest entry is evicted first
+        self._head_cache: Dict[Tuple[str, str], Tuple[bool, float]] = {}
+        self._head_cache_lock = threading.Lock()
+
+        # local_path -> monotonic timestamp of when os.path.isfile last returned False,
+        # kept in insertion (= timestamp) order so the oldest entry is evicted first
+        self._missing_files: Dict[str, float] = {}
+        self._missing_files_lock = threading.Lock()
+
+    def _local_file_exists(self, local_path: str) -> bool:
+        """
+        os.path.isfile() that remembers negative results for _MISSING_FILE_TTL_SEC,
+        so rows pointing at vanished files do not stat the network share every loop.
+        """
+        now = time.monotonic()
+        with self._missing_files_lock:
+            missing_since = self._missing_files.get(local_path)
+            if missing_since is not None and now - missing_since < _MISSING_FILE_TTL_SEC:
+                return False
+
+        # Stat outside the lock so other workers are not held up by the network share
+        exists = os.path.isfile(local_path)
+
+        with self._missing_files_lock:
+            self._missing_files.pop(local_path, None)
+            if not exists:
+                while len(self._missing_files) >= _MISSING_FILE_MAX_ENTRIES:
+                    # Dicts keep insertion order, so the first key is the oldest entry
+                    del self._missing_files[next(iter(self._missing_files))]
+                self._missing_files[local_path] = now
+        return exists
+
+    def _head_cache_get(self, bucket_name: str, s3_path: str) -> Optional[bool]:
         """
-        Attempts to upload a single image to S3.
-        If successful, inserts into `uploaded_s3` and deletes the row from `upload_to_s3`.
-        If failure, marks the row as 'failed'.
+        Returns the cached existence of an object, or None if unknown or expired.
+        """
+        key = (bucket_name, s3_path)
+        with self._head_cache_lock:
+            entry = self._head_cache.get(key)
+            if entry is None:
+                return None
+            exists, cached_at = entry
+            if time.monotonic() - cached_at > _HEAD_CACHE_TTL_SEC:
+                del self._head_cache[key]
+                return None
+            return exists
+
+    def _head_cache_put(self, bucket_name: str, s3_path: str, exists: bool):
+        now = time.monotonic()
+        key = (bucket_name, s3_path)
+        with self._head_cache_lock:
+            # Re-insert so dict order stays oldest-first, then evict from the front
+            self._head_cache.pop(key, None)
+            while len(self._head_cache) >= _HEAD_CACHE_MAX_ENTRIES:
+                del self._head_cache[next(iter(self._head_cache))]
+            self._head_cache[key] = (exists, now)
+
+    def upload_image(self, image_record: dict) -> UploadOutcome:
+        """
+        Attempts to upload a single image to S3. Only does S3 I/O; the returned
+        UploadOutcome is written to the DB by the caller via record_outcomes,
+        batched with the rest of the claimed rows.
         Potential meltdown is detected if repeated service-level errors happen.
         """
         upload_id = image_record['id']
         local_path = image_record['local_path']
-        image_id = image_record['image_id']
-        acq_id = image_record['acq_id']
-        s3_path = local_path.lstrip('/')  # Remove any leading slashes
-        bucket_name = 'mikro'
-
-        if not os.path.isfile(local_path):
-            error_msg = f"Local file {local_path} does not exist."
-            logging.error(error_msg)
-            self.db.mark_as_failed(upload_id, error_msg)
-            return
 
+        outcome = UploadOutcome.from_record(image_record, UploadState.SUCCESS)
         try:
+            if not self._local_file_exists(local_path):
+                error_msg = f"Local file {local_path} does not exist."
+                logging.error(error_msg)
+                outcome.state = UploadState.MISSING_FILE
+                outcome.error = error_msg
+                return outcome
+
             s3_client = self.s3_client_wrapper.get_fresh_s3_client()
 
             # Check if file exists in S3
-            if self.file_exists_in_s3(s3_client, bucket_name, s3_path):
-                logging.info(f"S3 already has {s3_path}. Removing DB row for upload_id={upload_id}.")
-                self.db.delete_uploaded_record(upload_id)
-                return
+            if self.file_exists_in_s3(s3_client, outcome.bucket, outcome.s3_path):
+                logging.info(f"S3 already has {outcome.s3_path}. Removing DB row for upload_id={upload_id}.")
+                outcome.state = UploadState.S3_EXISTS
+                return outcome
 
             # Attempt upload
-            self.upload_file_to_s3(s3_client, bucket_name, local_path, s3_path)
-
-            # Insert into 'uploaded_s3' table
-            self.db.insert_into_uploaded_s3(
-                image_id=image_id,
-                acq_id=acq_id,
-                local_path=local_path,
-                s3_path=s3_path,
-                bucket_name=bucket_name
-            )
-
-            # If successful, delete record
-            self.db.delete_uploaded_record(upload_id)
-            logging.info(f"Successfully uploaded ID {upload_id} → s3://{bucket_name}/{s3_path} and removed from DB.")
+            self.upload_file_to_s3(s3_client, outcome.bucket, local_path, outcome.s3_path)
+            self._head_cache_put(outcome.bucket, outcome.s3_path, True)
+            logging.info(f"Successfully uploaded ID {upload_id} → s3://{outcome.bucket}/{outcome.s3_path}")
 
             # Reset meltdown error count on success
             self.consecutive_meltdown_errors = 0
+            return outcome
 
         except S3MeltdownError:
             # Bubble up meltdown to stop further processing
@@ -121,21 +258,95 @@ class S3ImageUploader:
             # Normal failure
             error_msg = f"Failed to upload image ID {upload_id}: {str(e)}"
             logging.exception(error_msg)
-            self.db.mark_as_failed(upload_id, str(e))
+            outcome.state = UploadState.FAILED
+            outcome.error = str(e)
+            return outcome
+
+    def record_outcomes(self, conn, outcomes: List[UploadOutcome]):
+        """
+        Writes a batch of outcomes with one statement per kind of change:
+        successes go into `uploaded_s3`, successes and already-present rows are deleted
+        from `upload_to_s3`, and missing/failed rows are marked as 'failed'.
+        Already-present rows are also added to `uploaded_s3` if it has no row for the
+        object yet: if an earlier batch's transaction was rolled back after its uploads
+        succeeded, its objects come back as S3_EXISTS and would otherwise go unrecorded.
+        `conn` is the claiming connection; the statements share one pipeline flight.
+        """
+        by_state: Dict[UploadState, List[UploadOutcome]] = {state: [] for state in UploadState}
+        for outcome in outcomes:
+            by_state[outcome.state].append(outcome)
+
+        success = by_state[UploadState.SUCCESS]
+        present = by_state[UploadState.S3_EXISTS]
+        delete_ids = [o.upload_id for o in success + present]
+        failed_pairs = [(o.upload_id, o.error) for o in by_state[UploadState.MISSING_FILE] + by_state[UploadState.FAILED]]
+
+        with conn.pipeline():
+            self.db.batch_insert_uploaded_s3(
+                [(o.image_id, o.acq_id, o.local_path, o.s3_path, o.bucket) for o in success],
+                conn=conn
+            )
+            self.db.batch_insert_uploaded_s3_if_missing(
+                [(o.image_id, o.acq_id, o.local_path, o.s3_path, o.bucket) for o in present],
+                conn=conn
+            )
+            self.db.batch_delete(delete_ids, conn=conn)
+            self.db.batch_mark_failed(failed_pairs, conn=conn)
+
+        logging.info(
+            f"Recorded batch: {len(success)} uploaded, {len(present)} already in S3, "
+            f"{len(by_state[UploadState.MISSING_FILE])} missing locally, {len(by_state[UploadState.FAILED])} failed."
+        )
+
+    def prefetch_s3_presence(self, records: List[dict]) -> List[int]:
+        """
+        Checks S3 existence for a whole batch concurrently, so upload workers do not
+        block on HEAD requests. Results land in the head cache, which upload_image
+        consults before issuing its own HEAD.
+        Returns the upload IDs whose objects are already in S3.
+        Raises S3MeltdownError on repeated service-level errors.
+        """
+        s3_client = self.s3_client_wrapper.get_fresh_s3_client()
+        bucket_name = BUCKET_NAME
+        already_present = []
+
+        future_to_id = {
+            self._head_pool.submit(self.file_exists_in_s3, s3_client, bucket_name, record['local_path'].lstrip('/')): record['id']
+            for record in records
+        }
+        for future in concurrent.futures.as_completed(future_to_id):
+            try:
+                if future.result():
+                    already_present.append(future_to_id[future])
+            except S3MeltdownError:
+                for pending in future_to_id:
+                    pending.cancel()
+                raise
+            except Exception as e:
+                # Leave it to upload_image, which re-checks uncached keys
+                logging.warning(f"Existence check failed for upload ID {future_to_id[future]}: {e}")
+
+        return already_present
 
     def file_exists_in_s3(self, s3_client, bucket_name: str, s3_path: str) -> bool:
         """
         Checks if the specified object already exists in the S3 bucket.
         Returns True if it exists, False otherwise.
+        Results are cached for _HEAD_CACHE_TTL_SEC, so retries skip the HEAD request.
         """
-        from botocore.exceptions import ClientError
+        cached = self._head_cache_get(bucket_name, s3_path)
+        if cached is not None:
+            return cached
+
         try:
             s3_client.head_object(Bucket=bucket_name, Key=s3_path)
+            self._head_cache_put(bucket_name, s3_path, True)
             return True
         except ClientError as e:
             error_code = e.response['Error']['Code']
             # If it's a 404, object not found -> return False
             if error_code == '404':
+                self._head_cache_put(bucket_name, s3_path, False)
                 return False
 
             # Potential meltdown check: e.g. 503 or connection-level issue
@@ -153,18 +364,48 @@ class S3ImageUploader:
 
     def upload_file_to_s3(self, s3_client, bucket_name: str, local_path: str, s3_path: str):
         """
-        Use simple non multipart for these not so big files
+        Use simple non multipart for small files, and multipart with concurrent
+        parts for anything at or above the multipart threshold.
+        """
+        if os.path.getsize(local_path) < self._transfer_config.multipart_threshold:
+            self.upload_file_to_s3_non_multipart(s3_client, bucket_name, local_path, s3_path)
+        else:
+            self.upload_file_to_s3_multipart(s3_client, bucket_name, local_path, s3_path)
+
+    def upload_file_to_s3_multipart(self, s3_client, bucket_name: str, local_path: str, s3_path: str):
+        """
+        Uploads a file to an S3 bucket with the boto3 transfer manager. Parts are sent
+        concurrently and retried individually.
+        Given a filename, the transfer manager reads each part straight from its own
+        offset in the file, so there is no shared Python-level buffer to copy through.
         """
-        self.upload_file_to_s3_non_multipart(s3_client, bucket_name, local_path, s3_path)
+        try:
+            s3_client.upload_file(local_path, bucket_name, s3_path,
+                                  ExtraArgs=self._upload_extra_args, Config=self._transfer_config)
+            logging.info(f"Uploaded (multipart) {local_path} → s3://{bucket_name}/{s3_path}")
+        except S3UploadFailedError as e:
+            # The transfer manager wraps the underlying ClientError
+            cause = e.__cause__ or e.__context__
+            error_code = cause.response['Error']['Code'] if isinstance(cause, ClientError) else None
+            if error_code in ['503', 'RequestTimeout', 'ServiceUnavailable']:
+                self.consecutive_meltdown_errors += 1
+                if self.consecutive_meltdown_errors >= self.meltdown_threshold:
+                    logging.error("S3 meltdown detected (multipart upload).")
+                    send_error_to_slack_rate_limited(
+                        "S3 meltdown detected during multipart upload.",
+                        title="S3 Meltdown"
+                    )
+                    raise S3MeltdownError("Too many consecutive meltdown-level errors.")
+            # Re-raise to handle as normal failure
+            raise
 
     def upload_file_to_s3_non_multipart(self, s3_client, bucket_name: str, local_path: str, s3_path: str):
         """
         Uploads a file to an S3 bucket using put_object. Single-part approach.
         """
-        from botocore.exceptions import ClientError
         try:
-            with open(local_path, 'rb') as file:
-                s3_client.put_object(Bucket=bucket_name, Key=s3_path, Body=file)
+            with open(local_path, 'rb', buffering=_UPLOAD_READ_BUFFER_BYTES) as file:
+                s3_client.put_object(Bucket=bucket_name, Key=s3_path, Body=file, **self._upload_extra_args)
                 logging.info(f"Uploaded {local_path} → s3://{bucket_name}/{s3_path}")
         except ClientError as e:
             error_code = e.response['Error']['Code']
@@ -180,6 +421,15 @@ class S3ImageUploader:
             # Re-raise to handle as normal failure
             raise
 
+    def close(self):
+        """
+        Shuts down the long-lived worker pools and closes all DB connections.
+        Called by both run loops on exit.
+        """
+        self._pool.shutdown(wait=True, cancel_futures=True)
+        self._head_pool.shutdown(wait=True, cancel_futures=True)
+        self.db.close_all_connections()
+
     def run(self):
         # Always send startup info to Slack (not rate-limited)
         try:
@@ -188,43 +438,96 @@ class S3ImageUploader:
             pass
         self.run_multithreaded()
 
+    def upload_batch(self, conn, pending_images: List[dict]) -> bool:
+        """
+        Uploads one claimed batch concurrently and records all outcomes on `conn`,
+        the connection holding the claim.
+        Returns True if a meltdown was detected.
+        """
+        logging.info(f"Found {len(pending_images)} images pending upload.")
+        meltdown_detected = False
+
+        # Outcomes are collected here and written to the DB once per batch
+        outcomes: List[UploadOutcome] = []
+
+        try:
+            already_present = set(self.prefetch_s3_presence(pending_images))
+        except S3MeltdownError:
+            logging.warning("Meltdown detected while checking S3, skipping uploads.")
+            already_present = set()
+            meltdown_detected = True
+
+        if already_present:
+            logging.info(f"S3 already has {len(already_present)} of the pending images.")
+        to_upload = []
+        for record in pending_images:
+            if record['id'] in already_present:
+                outcomes.append(UploadOutcome.from_record(record, UploadState.S3_EXISTS))
+            elif not meltdown_detected:
+                to_upload.append(record)
+
+        # Concurrent uploads on the shared worker pool
+        future_to_record = {
+            self._pool.submit(self.upload_image, record): record
+            for record in to_upload
+        }
+
+        def collect(future) -> bool:
+            """Appends the future's outcome; returns True if it raised a meltdown."""
+            try:
+                outcomes.append(future.result())  # Raises exception if meltdown or other error
+            except S3MeltdownError:
+                return True
+            except Exception as e:
+                # upload_image handles its own errors; anything escaping it still gets a
+                # FAILED outcome so the row is not silently left for the next claim
+                record = future_to_record[future]
+                logging.exception(f"Unexpected error uploading image ID {record['id']}: {e}")
+                outcomes.append(UploadOutcome.from_record(record, UploadState.FAILED, str(e)))
+            return False
+
+        remaining = set(future_to_record)
+        for future in concurrent.futures.as_completed(future_to_record):
+            remaining.discard(future)
+            if collect(future):
+                logging.warning("Meltdown detected, skipping remaining uploads.")
+                meltdown_detected = True
+                # Drop uploads that have not started yet
+                for pending in remaining:
+                    pending.cancel()
+                break
+
+        # Uploads already running when the meltdown hit still finish; record what they
+        # did so an object uploaded now is not later mistaken for S3_EXISTS
+        running = [f for f in remaining if not f.cancelled()]
+        if running:
+            concurrent.futures.wait(running)
+            for future in running:
+                collect(future)
+
+        # Record everything that completed, even if meltdown cut the batch short
+        self.record_outcomes(conn, outcomes)
+
+        return meltdown_detected
+
     def run_multithreaded(self):
         """
         Continuously loop to check for and upload pending images.
         If meltdown is detected, we stop.
-        If no images found, sleep for self.sleep_time seconds, then re-check.
+        If no images found, wait up to self.sleep_time seconds for a new-upload notification, then re-check.
         """
 
         while True:
             try:
-                pending_images = self.db.fetch_pending_uploads(limit=50)
+                # Rows stay claimed (locked against other uploaders) until the batch is finalized
+                with self.db.claim_pending_uploads(limit=50) as (conn, pending_images):
+                    meltdown_detected = self.upload_batch(conn, pending_images) if pending_images else False
 
                 if not pending_images:
-                    logging.info(f"No pending images to upload. Sleeping {self.sleep_time} sec...")
-                    time.sleep(self.sleep_time)
+                    logging.info(f"No pending images to upload. Waiting up to {self.sleep_time} sec for new ones...")
+                    self.db.wait_for_new_uploads(self.sleep_time)
                     continue  # Then re-check in the next loop iteration
 
-                logging.info(f"Found {len(pending_images)} images pending upload.")
-                meltdown_detected = False
-
-                # Use ThreadPoolExecutor for concurrent uploads
-                with concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers) as executor:
-                    future_to_record = {
-                        executor.submit(self.upload_image, record): record
-                        for record in pending_images
-                    }
-
-                    for future in concurrent.futures.as_completed(future_to_record):
-                        try:
-                            future.result()  # Raises exception if meltdown or other error
-                        except S3MeltdownError:
-                            logging.warning("Meltdown detected, skipping remaining uploads.")
-                            meltdown_detected = True
-                            break
-                        except Exception as e:
-                            # Already handled in upload_image, but we can log or handle more if needed
-                            pass
-
                 if meltdown_detected:
                     logging.info("Exiting early due to meltdown.")
                     send_error_to_slack_rate_limited(
@@ -240,8 +543,8 @@ class S3ImageUploader:
                 # We'll keep going to avoid stopping on a single random error
                 pass
 
-        # Once meltdown or another break condition, close connections
-        self.db.close_all_connections()
+        # Once meltdown or another break condition, stop the workers and close connections
+        self.close()
         logging.info("Stopped continuous upload loop due to meltdown or shutdown.")
 
 
@@ -249,34 +552,39 @@ class S3ImageUploader:
         """
         Continuously loop to check for and upload pending images in a single-threaded manner.
         If meltdown is detected, we stop.
-        If no images found, sleep self.sleep_time seconds, then re-check.
+        If no images found, wait up to self.sleep_time seconds for a new-upload notification, then re-check.
         """
 
         while True:
             try:
-                # Fetch up to 50 pending uploads
-                pending_images = self.db.fetch_pending_uploads(limit=50)
+                meltdown_detected = False
 
-                if not pending_images:
-                    logging.info(f"No pending images to upload. Sleeping {self.sleep_time} seconds...")
-                    time.sleep(self.sleep_time)
-                    continue  # Then loop back to re-check
+                # Claim up to 50 pending uploads; they stay locked until the batch is done
+                with self.db.claim_pending_uploads(limit=50) as (conn, pending_images):
+                    if pending_images:
+                        logging.info(f"Found {len(pending_images)} images pending upload.")
 
-                logging.info(f"Found {len(pending_images)} images pending upload.")
-                meltdown_detected = False
+                    # Single-thread: just iterate over the images
+                    outcomes: List[UploadOutcome] = []
+                    for record in pending_images:
+                        try:
+                            outcomes.append(self.upload_image(record))
+                        except S3MeltdownError:
+                            # A meltdown-level error means we skip further processing
+                            logging.warning("Meltdown detected, stopping further uploads.")
+                            meltdown_detected = True
+                            break
+                        except Exception as e:
+                            # Same as upload_batch: never drop a claimed row without an outcome
+                            logging.exception(f"Unexpected error uploading image ID {record['id']}: {e}")
+                            outcomes.append(UploadOutcome.from_record(record, UploadState.FAILED, str(e)))
+
+                    self.record_outcomes(conn, outcomes)
 
-                # Single-thread: just iterate over the images
-                for record in pending_images:
-                    try:
-                        self.upload_image(record)
-                    except S3MeltdownError:
-                        # A meltdown-level error means we skip further processing
-                        logging.warning("Meltdown detected, stopping further uploads.")
-                        meltdown_detected = True
-                        break
-                    except Exception as e:
-                        # Already handled/logged in upload_image, but can optionally log more here
-                        pass
+                if not pending_images:
+                    logging.info(f"No pending images to upload. Waiting up to {self.sleep_time} seconds for new ones...")
+                    self.db.wait_for_new_uploads(self.sleep_time)
+                    continue  # Then loop back to re-check
 
                 if meltdown_detected:
                     # If meltdown, break out of the while loop
@@ -289,6 +597,6 @@ class S3ImageUploader:
                 # You can decide whether to break or keep going. We keep going:
                 pass
 
-        # Once meltdown or other reason, close connections and log
-        self.db.close_all_connections()
+        # Once meltdown or other reason, stop the workers, close connections and log
+        self.close()
         logging.info("Stopped single-threaded continuous loop (meltdown or shutdown).")
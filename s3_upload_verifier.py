@@ -2,10 +2,18 @@ import os
 import random
 import logging
 import sys
-from typing import List, Tuple, Iterator
+import concurrent.futures
+import itertools
+import math
+import queue
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Tuple, Iterator
+import asyncio
 import argparse  # kept unused; safe to remove if desired
 
 from dotenv import load_dotenv
+from botocore.config import Config
 from botocore.exceptions import ClientError
 
 from s3_client_wrapper import S3ClientWrapper
@@ -13,6 +21,22 @@ from s3_client_wrapper import S3ClientWrapper
 
 BUCKET_NAME = "mikro"  # Keep in sync with s3_image_uploader.py
 
+logger = logging.getLogger(__name__)
+
+# Module PRNG, seeded by main() when SEED is set. Descent worker threads each draw
+# from their own Random (see _thread_rng), seeded from this one, instead of all
+# sharing the global random module's generator.
+_rng = random.Random()
+_thread_state = threading.local()
+
+
+def _thread_rng() -> random.Random:
+    rng = getattr(_thread_state, 'rng', None)
+    if rng is None:
+        # _rng is itself seeded from os.urandom unless main() seeded it with SEED
+        rng = _thread_state.rng = random.Random(_rng.getrandbits(64))
+    return rng
+
 
 def setup_logging(verbose: bool = False, log_to_file: str | None = None) -> None:
     level = logging.DEBUG if verbose else logging.INFO
@@ -47,31 +71,58 @@ def setup_logging(verbose: bool = False, log_to_file: str | None = None) -> None
     logging.getLogger("urllib3").setLevel(logging.WARNING)
 
 
-def iter_files(root_dir: str, recursive: bool = True) -> List[str]:
-    files: List[str] = []
+def iter_files(root_dir: str, recursive: bool = True) -> Iterator[str]:
     if recursive:
+        # os.walk already split entries into dirs and files via scandir
         for base, _dirs, fnames in os.walk(root_dir):
             for f in fnames:
-                full = os.path.join(base, f)
-                if os.path.isfile(full):
-                    files.append(full)
+                yield os.path.join(base, f)
     else:
         try:
-            for f in os.listdir(root_dir):
-                full = os.path.join(root_dir, f)
-                if os.path.isfile(full):
-                    files.append(full)
+            with os.scandir(root_dir) as it:
+                for entry in it:
+                    try:
+                        # Uses the DirEntry's cached type; no extra stat per entry
+                        if entry.is_file(follow_symlinks=False):
+                            yield entry.path
+                    except OSError:
+                        continue
         except FileNotFoundError:
             pass
-    return files
 
 
-def choose_random(files: List[str], n: int) -> List[str]:
-    if not files:
+def _open_unit_random(rng: random.Random) -> float:
+    # random() is in [0, 1); Algorithm L needs logs of values in (0, 1)
+    u = rng.random()
+    while u == 0.0:
+        u = rng.random()
+    return u
+
+
+def choose_random(files: Iterable[str], n: int) -> List[str]:
+    """
+    Uniformly picks up to N items from `files` in one pass with O(N) memory
+    (reservoir sampling, Algorithm L), so the full file list is never built.
+    Returns everything if there are N items or fewer.
+    """
+    if n <= 0:
         return []
-    if n >= len(files):
-        return files
-    return random.sample(files, n)
+    it = iter(files)
+    reservoir = list(itertools.islice(it, n))
+    if len(reservoir) < n:
+        return reservoir
+
+    rng = _rng
+    w = math.exp(math.log(_open_unit_random(rng)) / n)
+    while True:
+        # Number of items to pass over before the next replacement
+        skip = math.floor(math.log(_open_unit_random(rng)) / math.log1p(-w)) if w < 1.0 else 0
+        nxt = next(itertools.islice(it, skip, skip + 1), None)
+        if nxt is None:
+            break
+        reservoir[rng.randrange(n)] = nxt
+        w *= math.exp(math.log(_open_unit_random(rng)) / n)
+    return reservoir
 
 
 def key_for_local_path(local_path: str) -> str:
@@ -79,46 +130,159 @@ def key_for_local_path(local_path: str) -> str:
     return local_path.lstrip('/')
 
 
+def _listing_has_key(resp: dict, key: str) -> bool:
+    # With Prefix=key the exact key, if present, sorts first among its matches
+    contents = resp.get('Contents') or []
+    return bool(contents) and contents[0]['Key'] == key
+
+
 def check_exists(s3_client, bucket: str, key: str) -> Tuple[bool, str]:
+    """
+    Existence check via ListObjectsV2(Prefix=key, MaxKeys=1) rather than HEAD: a miss
+    is an ordinary empty response instead of a 404 exception, and a hit carries the
+    object's size/ETag in the same round-trip should the verifier start comparing them.
+    """
+    try:
+        resp = s3_client.list_objects_v2(Bucket=bucket, Prefix=key, MaxKeys=1)
+        if _listing_has_key(resp, key):
+            return True, ""
+        return False, "Not found (not listed)"
+    except ClientError as e:
+        code = e.response.get('Error', {}).get('Code')
+        return False, f"ClientError: {code}"
+    except Exception as e:
+        return False, f"Error: {e}"
+
+
+# ListObjectsV2 page size per candidate key in a prefix; sampled files are sparse in
+# their directories, so a page only needs to reach a little past the last candidate
+_LIST_KEYS_PER_CANDIDATE = 32
+
+
+def check_exists_batch(s3_client, bucket: str, keys: List[str],
+                       max_pages_per_prefix: int = 4) -> Dict[str, Tuple[bool, str]]:
+    """
+    Checks many keys with one ListObjectsV2 listing per parent "directory" instead of
+    a HEAD per key. Each prefix is listed from just before its smallest candidate
+    (StartAfter) and only until the listing passes its largest candidate, so a
+    directory holding one candidate usually costs a single request.
+    A prefix with a single candidate goes straight to check_exists (one MaxKeys=1
+    probe), and pages are sized to the number of candidates rather than the default
+    1000 keys. Keys the listing could not settle (page cap reached, listing error)
+    fall back to check_exists. Returns {key: (exists, err)} in the same form as check_exists.
+    """
+    by_prefix: Dict[str, List[str]] = {}
+    for key in keys:
+        prefix = key.rsplit('/', 1)[0] + '/' if '/' in key else ''
+        by_prefix.setdefault(prefix, []).append(key)
+
+    results: Dict[str, Tuple[bool, str]] = {}
+    for prefix, candidates in by_prefix.items():
+        if len(candidates) == 1:
+            results[candidates[0]] = check_exists(s3_client, bucket, candidates[0])
+            continue
+        candidates.sort()
+        wanted = set(candidates)
+        found: set = set()
+        last_listed = ""
+        settled = False
+        try:
+            paginator = s3_client.get_paginator('list_objects_v2')
+            pages = paginator.paginate(
+                Bucket=bucket,
+                Prefix=prefix,
+                Delimiter='/',
+                StartAfter=candidates[0][:-1],  # sorts just before the first candidate
+                PaginationConfig={'PageSize': min(1000, _LIST_KEYS_PER_CANDIDATE * len(candidates))},
+            )
+            for page_no, page in enumerate(pages, start=1):
+                for obj in page.get('Contents', []):
+                    if obj['Key'] in wanted:
+                        found.add(obj['Key'])
+                    last_listed = obj['Key']
+                if not page.get('IsTruncated') or last_listed >= candidates[-1]:
+                    settled = True
+                    break
+                if page_no >= max_pages_per_prefix:
+                    break
+        except Exception as e:
+            logger.debug("Listing s3://%s/%s failed, falling back to per-key checks: %s", bucket, prefix, e)
+            last_listed = ""
+
+        for key in candidates:
+            if key in found:
+                results[key] = (True, "")
+            elif settled or key <= last_listed:
+                results[key] = (False, "Not found (not listed)")
+            else:
+                results[key] = check_exists(s3_client, bucket, key)
+    return results
+
+
+async def check_exists_async(s3_async, bucket: str, key: str) -> Tuple[bool, str]:
+    """
+    check_exists for an aiobotocore client; returns (exists, err) in the same form.
+    """
     try:
-        s3_client.head_object(Bucket=bucket, Key=key)
-        return True, ""
+        resp = await s3_async.list_objects_v2(Bucket=bucket, Prefix=key, MaxKeys=1)
+        if _listing_has_key(resp, key):
+            return True, ""
+        return False, "Not found (not listed)"
     except ClientError as e:
         code = e.response.get('Error', {}).get('Code')
-        if code == '404':
-            return False, "Not found (404)"
         return False, f"ClientError: {code}"
     except Exception as e:
         return False, f"Error: {e}"
 
 
+# Every upper/lower-case spelling of ".tif" and ".tiff" (24 variants), so the
+# hot scandir loops can use a single endswith() without lower-casing each name
+_TIFF_SUFFIXES = tuple(
+    "".join(chars)
+    for stem in (".tif", ".tiff")
+    for chars in itertools.product(*((c.lower(), c.upper()) if c.isalpha() else (c,) for c in stem))
+)
+
+
 def is_tiff(filename: str) -> bool:
-    name = filename.lower()
-    return name.endswith('.tif') or name.endswith('.tiff')
+    return filename.endswith(_TIFF_SUFFIXES)
 
 
-def find_random_tiff_in_tree(root_dir: str,
-                             max_depth: int = 10,
-                             max_scandir_per_dir: int = 1000) -> str:
+class DirCache:
     """
-    Descend randomly from root_dir, scanning at most `max_scandir_per_dir` entries per directory.
-    If a directory contains any TIFF files (within the cap), pick one randomly and return it.
-    Returns empty string if none found within the constraints.
+    Memoizes one capped `os.scandir` per directory, so repeated random descents
+    reuse what earlier descents already listed instead of re-scanning the same
+    top-level directories. Entries are filled lazily on first visit.
+    Safe to share between threads: two descents racing on the same directory
+    may both scan it, and the last result wins.
     """
-    current = root_dir
-    logging.debug(f"Descend: start at {current}, max_depth={max_depth}, max_scandir_per_dir={max_scandir_per_dir}")
 
-    for _ in range(max_depth):
+    def __init__(self, max_scandir_per_dir: int = 1000, max_tiffs_per_dir: int = 16) -> None:
+        self.max_scandir_per_dir = max_scandir_per_dir
+        self.max_tiffs_per_dir = max_tiffs_per_dir
+        # path -> (tiffs, subdirs, scanned), or None if the directory could not be read
+        self._entries: Dict[str, Tuple[List[str], List[str], int] | None] = {}
+
+    def children(self, path: str) -> Tuple[List[str], List[str], int] | None:
+        """
+        Returns (tiffs, subdirs, scanned) for `path`, scanning it on first use.
+        Returns None if the directory cannot be read.
+        """
+        if path in self._entries:
+            return self._entries[path]
+
         tiffs: List[str] = []
         subdirs: List[str] = []
         scanned = 0
         try:
-            with os.scandir(current) as it:
+            with os.scandir(path) as it:
                 for entry in it:
                     try:
-                        if entry.is_file(follow_symlinks=False) and is_tiff(entry.name):
+                        # Anything that is not a directory counts as a file: one d_type
+                        # check per entry, and no lstat fallback for is_file on NFS
+                        if is_tiff(entry.name) and not entry.is_dir(follow_symlinks=False):
                             tiffs.append(entry.path)
-                            if len(tiffs) >= 16:  # cap choices for speed
+                            if len(tiffs) >= self.max_tiffs_per_dir:  # cap choices for speed
                                 break
                         elif entry.is_dir(follow_symlinks=False):
                             subdirs.append(entry.path)
@@ -126,23 +290,74 @@ def find_random_tiff_in_tree(root_dir: str,
                         # Skip entries we cannot stat
                         continue
                     scanned += 1
-                    if scanned >= max_scandir_per_dir:
+                    if scanned >= self.max_scandir_per_dir:
                         break
+            result = (tiffs, subdirs, scanned)
         except (FileNotFoundError, NotADirectoryError, PermissionError):
+            result = None
+
+        self._entries[path] = result
+        return result
+
+    def weight(self, path: str) -> int:
+        """
+        Descent weight for `path`: the number of TIFFs and subdirectories seen on
+        a previous scan, 0 if it was unreadable or barren, 1 if not yet visited.
+        """
+        if path not in self._entries:
+            return 1
+        listing = self._entries[path]
+        if listing is None:
+            return 0
+        tiffs, subdirs, _scanned = listing
+        return len(tiffs) + len(subdirs)
+
+
+def find_random_tiff_in_tree(root_dir: str,
+                             max_depth: int = 10,
+                             max_scandir_per_dir: int = 1000,
+                             cache: DirCache | None = None) -> str:
+    """
+    Descend randomly from root_dir, scanning at most `max_scandir_per_dir` entries per directory.
+    If a directory contains any TIFF files (within the cap), pick one randomly and return it.
+    Returns empty string if none found within the constraints.
+    Pass a shared `cache` to reuse directory listings across descents.
+    """
+    if cache is None:
+        cache = DirCache(max_scandir_per_dir=max_scandir_per_dir)
+    current = root_dir
+    rng = _thread_rng()
+    debug = logger.isEnabledFor(logging.DEBUG)
+    if debug:
+        logger.debug("Descend: start at %s, max_depth=%d, max_scandir_per_dir=%d",
+                     current, max_depth, max_scandir_per_dir)
+
+    for _ in range(max_depth):
+        listing = cache.children(current)
+        if listing is None:
             return ""
+        tiffs, subdirs, scanned = listing
 
-        logging.debug(f"Descend: scanned ~{scanned} entries in {current}, tiffs={len(tiffs)}, subdirs={len(subdirs)}")
+        if debug:
+            logger.debug("Descend: scanned ~%d entries in %s, tiffs=%d, subdirs=%d",
+                         scanned, current, len(tiffs), len(subdirs))
 
         if tiffs:
-            choice = random.choice(tiffs)
-            logging.debug(f"Descend: found TIFF in {current}: {choice}")
+            choice = rng.choice(tiffs)
+            if debug:
+                logger.debug("Descend: found TIFF in %s: %s", current, choice)
             return choice
 
         if not subdirs:
             return ""
 
-        current = random.choice(subdirs)
-        logging.debug(f"Descend: continue into subdir {current}")
+        # Favour branches that earlier descents found populated; barren ones drop to 0
+        weights = [cache.weight(d) for d in subdirs]
+        if not any(weights):
+            return ""
+        current = rng.choices(subdirs, weights=weights, k=1)[0]
+        if debug:
+            logger.debug("Descend: continue into subdir %s", current)
 
     return ""
 
@@ -158,22 +373,31 @@ def sample_random_tiffs(root_dir: str,
     """
     chosen: List[str] = []
     seen: set = set()
+    # Bound methods hoisted out of the loop (saves an attribute lookup per candidate)
+    chosen_append = chosen.append
+    seen_add = seen.add
+    normpath = os.path.normpath
     attempts = 0
+    cache = DirCache(max_scandir_per_dir=max_scandir_per_dir)
 
-    logging.info(f"Sampling TIFFs: target={n}, max_attempts={max_attempts}, max_depth={max_depth}, per_dir_cap={max_scandir_per_dir}")
+    logger.info("Sampling TIFFs: target=%d, max_attempts=%d, max_depth=%d, per_dir_cap=%d",
+                n, max_attempts, max_depth, max_scandir_per_dir)
     while len(chosen) < n and attempts < max_attempts:
         attempts += 1
-        found = find_random_tiff_in_tree(root_dir, max_depth=max_depth, max_scandir_per_dir=max_scandir_per_dir)
+        found = find_random_tiff_in_tree(root_dir, max_depth=max_depth, max_scandir_per_dir=max_scandir_per_dir,
+                                         cache=cache)
         if not found:
             if attempts % 100 == 0:
-                logging.info(f"Sampling progress: attempts={attempts}, found={len(chosen)}/{n}")
+                logger.info("Sampling progress: attempts=%d, found=%d/%d", attempts, len(chosen), n)
             continue
-        if found in seen:
-            logging.debug(f"Duplicate candidate skipped: {found}")
+        # Key on the normalized path so "a//b" and "a/./b" count as the same file
+        norm = normpath(found)
+        if norm in seen:
+            logger.debug("Duplicate candidate skipped: %s", found)
             continue
-        seen.add(found)
-        chosen.append(found)
-        logging.info(f"Sampling progress: selected {len(chosen)}/{n} -> {found}")
+        seen_add(norm)
+        chosen_append(found)
+        logger.info("Sampling progress: selected %d/%d -> %s", len(chosen), n, found)
     return chosen
 
 
@@ -181,36 +405,305 @@ def yield_random_tiffs(root_dir: str,
                        n: int,
                        max_attempts: int = 5000,
                        max_depth: int = 10,
-                       max_scandir_per_dir: int = 1000) -> Iterator[str]:
+                       max_scandir_per_dir: int = 1000,
+                       workers: int = 16) -> Iterator[str]:
     """
     Generator version: yields up to N unique TIFF file paths as they are found
     via repeated random descents. Stops early if attempts are exhausted.
 
     This allows immediate verification/processing per file without collecting
-    the full sample first.
+    the full sample first. Up to `workers` descents run concurrently so that
+    slow scandir calls on network filesystems overlap.
     """
     seen: set = set()
+    seen_add = seen.add
+    normpath = os.path.normpath
     attempts = 0
     emitted = 0
+    cache = DirCache(max_scandir_per_dir=max_scandir_per_dir)
 
-    logging.info(
-        f"Sampling (streaming): target={n}, max_attempts={max_attempts}, max_depth={max_depth}, per_dir_cap={max_scandir_per_dir}"
+    logger.info(
+        "Sampling (streaming): target=%d, max_attempts=%d, max_depth=%d, per_dir_cap=%d, workers=%d",
+        n, max_attempts, max_depth, max_scandir_per_dir, workers,
     )
 
-    while emitted < n and attempts < max_attempts:
-        attempts += 1
-        found = find_random_tiff_in_tree(root_dir, max_depth=max_depth, max_scandir_per_dir=max_scandir_per_dir)
-        if not found:
-            if attempts % 100 == 0:
-                logging.info(f"Streaming progress: attempts={attempts}, yielded={emitted}/{n}")
-            continue
-        if found in seen:
-            logging.debug(f"Duplicate candidate skipped: {found}")
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=workers)
+    in_flight: set = set()
+    try:
+        while emitted < n:
+            # Keep the window full; `seen` is only touched here, in the consumer
+            while len(in_flight) < workers and attempts < max_attempts:
+                attempts += 1
+                in_flight.add(executor.submit(find_random_tiff_in_tree, root_dir,
+                                              max_depth=max_depth,
+                                              max_scandir_per_dir=max_scandir_per_dir,
+                                              cache=cache))
+            if not in_flight:
+                break
+
+            done, in_flight = concurrent.futures.wait(in_flight, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                found = future.result()
+                if not found:
+                    if attempts % 100 == 0:
+                        logger.info("Streaming progress: attempts=%d, yielded=%d/%d", attempts, emitted, n)
+                    continue
+                norm = normpath(found)
+                if norm in seen:
+                    logger.debug("Duplicate candidate skipped: %s", found)
+                    continue
+                if emitted >= n:
+                    break
+                seen_add(norm)
+                emitted += 1
+                logger.info("Streaming progress: yielded %d/%d -> %s", emitted, n, found)
+                yield found
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def reservoir_sample_tiffs(root_dir: str, n: int) -> List[str]:
+    """
+    Walks the whole tree once and returns a uniform random sample of up to N
+    TIFF paths (reservoir sampling). Every directory is scanned exactly once,
+    so there is no wasted work on dead-end descents and no bias towards
+    shallow files, at the cost of not returning anything until the walk ends.
+    """
+    reservoir: List[str] = []
+    seen_tiffs = 0
+    stack = [root_dir]
+    randrange = _rng.randrange
+
+    logger.info("Sampling (reservoir): target=%d, root=%s", n, root_dir)
+    while stack:
+        current = stack.pop()
+        try:
+            with os.scandir(current) as it:
+                for entry in it:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+                            continue
+                        if not is_tiff(entry.name):
+                            continue
+                    except OSError:
+                        # Skip entries we cannot stat
+                        continue
+                    seen_tiffs += 1
+                    if len(reservoir) < n:
+                        reservoir.append(entry.path)
+                    else:
+                        j = randrange(seen_tiffs)
+                        if j < n:
+                            reservoir[j] = entry.path
+                    if seen_tiffs % 100000 == 0:
+                        logger.info("Reservoir progress: seen %d TIFFs, %d dirs queued", seen_tiffs, len(stack))
+        except (FileNotFoundError, NotADirectoryError, PermissionError):
             continue
-        seen.add(found)
-        emitted += 1
-        logging.info(f"Streaming progress: yielded {emitted}/{n} -> {found}")
-        yield found
+
+    logger.info("Reservoir sampling finished: kept %d of %d TIFFs", len(reservoir), seen_tiffs)
+    return reservoir
+
+
+class BackgroundWriter:
+    """
+    Appends lines to open text files from a single daemon thread, so callers only
+    enqueue. Lines are grouped per file and written in chunks of about `chunk_bytes`,
+    or at least every `flush_interval` seconds, each chunk followed by one flush.
+    Use as a context manager; leaving it writes out everything still queued.
+    """
+
+    def __init__(self, chunk_bytes: int = 8192, flush_interval: float = 0.5, maxsize: int = 1024) -> None:
+        self.chunk_bytes = chunk_bytes
+        self.flush_interval = flush_interval
+        # Bounded so a stalled filesystem applies backpressure instead of growing memory
+        self._queue: queue.Queue = queue.Queue(maxsize=maxsize)
+        self._pending: Dict[object, List[str]] = {}
+        self._pending_size: Dict[object, int] = {}
+        self._thread = threading.Thread(target=self._run, name="verifier-writer", daemon=True)
+        self._thread.start()
+
+    def __enter__(self) -> "BackgroundWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    def write(self, f, line: str) -> None:
+        self._queue.put((f, line))
+
+    def close(self) -> None:
+        self._queue.put(None)
+        self._thread.join()
+
+    def _write_out(self, f) -> None:
+        lines = self._pending.pop(f, None)
+        self._pending_size.pop(f, None)
+        if not lines:
+            return
+        try:
+            f.write("".join(lines))
+            f.flush()
+        except Exception as e:
+            logger.warning("Could not write %d lines to %s: %s", len(lines), getattr(f, 'name', f), e)
+
+    def _write_out_all(self) -> None:
+        for f in list(self._pending):
+            self._write_out(f)
+
+    def _run(self) -> None:
+        deadline = time.monotonic() + self.flush_interval
+        while True:
+            try:
+                item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                item = ()
+            if item is None:
+                break
+            if item:
+                f, line = item
+                self._pending.setdefault(f, []).append(line)
+                size = self._pending_size.get(f, 0) + len(line)
+                self._pending_size[f] = size
+                if size >= self.chunk_bytes:
+                    self._write_out(f)
+            if time.monotonic() >= deadline:
+                self._write_out_all()
+                deadline = time.monotonic() + self.flush_interval
+        self._write_out_all()
+
+
+def load_known_keys(path: str, max_age_sec: float) -> set:
+    """
+    Reads the S3 keys recorded in a previous run's found/missing output file
+    ("local_path<TAB> s3://bucket/key[<TAB> err]<TAB> checked_at" per line, with
+    checked_at in epoch seconds). Only keys checked within the last `max_age_sec`
+    are returned; lines without a timestamp (older runs) count as expired.
+    Returns an empty set if the file does not exist yet.
+    """
+    prefix = f"s3://{BUCKET_NAME}/"
+    cutoff = time.time() - max_age_sec
+    keys: set = set()
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                fields = line.rstrip("\n").split("\t")
+                if len(fields) < 3:
+                    continue
+                checked_at = fields[-1].strip()
+                if not checked_at.isdigit() or int(checked_at) < cutoff:
+                    continue
+                url = fields[1].strip()
+                if url.startswith(prefix):
+                    keys.add(url[len(prefix):])
+    except FileNotFoundError:
+        pass
+    return keys
+
+
+def verify_stream_threaded(stream: Iterator[Tuple[str, str]],
+                           s3_client,
+                           on_result: Callable[[str, str, bool, str], None],
+                           n: int,
+                           workers: int = 16,
+                           batch_size: int = 128) -> int:
+    """
+    Checks every (local_path, key) from `stream` with check_exists_batch on a thread
+    pool, `batch_size` keys per call and at most `workers` calls in flight.
+    Calls on_result(local_path, key, exists, err) per path, always from the calling
+    thread; returns the number checked.
+    """
+    total = 0
+    # future -> [(local_path, key), ...] for batches still in flight
+    in_flight = {}
+    batch: List[Tuple[str, str]] = []
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+        def handle_result(future) -> None:
+            batch_meta = in_flight.pop(future)
+            results = future.result()
+            for local_path, key in batch_meta:
+                exists, err = results[key]
+                on_result(local_path, key, exists, err)
+
+        def submit_batch() -> None:
+            in_flight[executor.submit(check_exists_batch, s3_client, BUCKET_NAME, [key for _, key in batch])] = list(batch)
+            batch.clear()
+
+        for idx, (local_path, key) in enumerate(stream, start=1):
+            total = idx
+            logger.info("[%d/%d] Checking S3 existence: s3://%s/%s", idx, n, BUCKET_NAME, key)
+            batch.append((local_path, key))
+            if len(batch) < batch_size:
+                continue
+            submit_batch()
+
+            # Sliding window: once full, handle whatever finishes first before sampling more
+            if len(in_flight) >= workers:
+                done, _ = concurrent.futures.wait(in_flight, return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in done:
+                    handle_result(future)
+
+        if batch:
+            submit_batch()
+        for future in concurrent.futures.as_completed(list(in_flight)):
+            handle_result(future)
+
+    return total
+
+
+async def verify_stream_async(stream: Iterator[Tuple[str, str]],
+                              endpoint_url: str,
+                              region: str | None,
+                              on_result: Callable[[str, str, bool, str], None],
+                              n: int,
+                              concurrency: int = 32) -> int:
+    """
+    Checks every (local_path, key) from `stream` with check_exists_async on one event loop, at most
+    `concurrency` in flight. The sampling generator keeps its own thread pool and
+    is advanced via asyncio.to_thread, so slow scandir calls never block the loop.
+    Calls on_result(local_path, key, exists, err) per path; returns the number checked.
+    Needs the optional aiobotocore package (it pins botocore, so pick the release
+    matching the boto3 version in requirements.txt).
+    """
+    from aiobotocore.config import AioConfig
+    from aiobotocore.session import get_session
+
+    config = AioConfig(
+        max_pool_connections=concurrency,
+        retries={'mode': 'adaptive', 'max_attempts': 5},
+        connect_timeout=3,
+        read_timeout=5,
+    )
+    semaphore = asyncio.Semaphore(concurrency)
+    tasks: set = set()
+    total = 0
+
+    async with get_session().create_client('s3', endpoint_url=endpoint_url, region_name=region,
+                                           config=config) as s3_async:
+        async def check(local_path: str, key: str) -> None:
+            try:
+                exists, err = await check_exists_async(s3_async, BUCKET_NAME, key)
+                on_result(local_path, key, exists, err)
+            finally:
+                semaphore.release()
+
+        while True:
+            item = await asyncio.to_thread(next, stream, None)
+            if item is None:
+                break
+            local_path, key = item
+            total += 1
+            logger.info("[%d/%d] Checking S3 existence: s3://%s/%s", total, n, BUCKET_NAME, key)
+            await semaphore.acquire()
+            task = asyncio.create_task(check(local_path, key))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+
+        if tasks:
+            await asyncio.gather(*tasks)
+
+    return total
 
 
 def main() -> int:
@@ -223,29 +716,54 @@ def main() -> int:
     SEED = None  # e.g., 123 for reproducibility
     VERBOSE = False
     LOG_FILE = "verifier.log"  # logs details of what happens during verification
+    HEAD_WORKERS = 16  # S3 existence checks in flight at once
+    CHECK_BATCH_SIZE = 128  # keys per check_exists_batch call
+    # "descent": stream results from random descents (fast start, biased to shallow files)
+    # "reservoir": one full walk, uniform sample (nothing is checked until the walk ends)
+    SAMPLER = "descent"
+    # Check keys with aiobotocore on an event loop instead of the thread pool below
+    # (needs the optional aiobotocore package; one request per key, no batching)
+    USE_ASYNC = False
+    ASYNC_CONCURRENCY = 32
+    # Keys found by a run within the last KNOWN_KEYS_TTL_SEC are not checked again.
+    # Keys that were missing are re-checked unless SKIP_PREVIOUSLY_MISSING is set;
+    # skipped missing keys still count against the exit status.
+    KNOWN_KEYS_TTL_SEC = 24 * 3600
+    SKIP_PREVIOUSLY_MISSING = False
 
     setup_logging(VERBOSE, log_to_file=LOG_FILE)
 
     if SEED is not None:
-        random.seed(SEED)
+        _rng.seed(SEED)
 
     root_dir = ROOT_DIR
 
     if not os.path.isdir(root_dir):
-        logging.error(f"Directory not found: {root_dir}")
+        logger.error("Directory not found: %s", root_dir)
         return 2
 
     load_dotenv()
     endpoint_url = os.getenv('ENDPOINT_URL')
     if not endpoint_url:
-        logging.error("ENDPOINT_URL env var not set. Export it or add to .env")
+        logger.error("ENDPOINT_URL env var not set. Export it or add to .env")
         return 3
 
-    s3_wrapper = S3ClientWrapper(endpoint_url=endpoint_url, region=os.getenv('AWS_REGION'))
+    # One client shared by all check workers (boto3 low-level clients are thread-safe);
+    # the connection pool must be larger than HEAD_WORKERS or requests queue for sockets.
+    # Short timeouts suit small metadata requests; adaptive retries absorb throttling.
+    client_config = Config(
+        max_pool_connections=64,
+        retries={'mode': 'adaptive', 'max_attempts': 5},
+        tcp_keepalive=True,
+        connect_timeout=3,
+        read_timeout=5,
+    )
+    s3_wrapper = S3ClientWrapper(endpoint_url=endpoint_url, region=os.getenv('AWS_REGION'), config=client_config)
     s3 = s3_wrapper.get_fresh_s3_client()
 
-    logging.info(
-        f"Starting verification with ROOT_DIR={root_dir}, N={N}, MAX_DEPTH={MAX_DEPTH}, PER_DIR_CAP={MAX_SCANDIR_PER_DIR}, SEED={SEED}"
+    logger.info(
+        "Starting verification with ROOT_DIR=%s, N=%d, SAMPLER=%s, MAX_DEPTH=%d, PER_DIR_CAP=%d, SEED=%s",
+        root_dir, N, SAMPLER, MAX_DEPTH, MAX_SCANDIR_PER_DIR, SEED,
     )
 
     hits = 0
@@ -257,53 +775,83 @@ def main() -> int:
     FOUND_OUTFILE = "verifier_found.txt"
     MISSING_OUTFILE = "verifier_missing.txt"
 
-    total = 0
-    stream = yield_random_tiffs(
-        root_dir,
-        N,
-        max_attempts=max(2000, N * 200),
-        max_depth=MAX_DEPTH,
-        max_scandir_per_dir=MAX_SCANDIR_PER_DIR,
-    )
+    known_found = load_known_keys(FOUND_OUTFILE, KNOWN_KEYS_TTL_SEC)
+    known_missing: set = set()
+    if SKIP_PREVIOUSLY_MISSING:
+        # A key found since it was last reported missing counts as found
+        known_missing = load_known_keys(MISSING_OUTFILE, KNOWN_KEYS_TTL_SEC) - known_found
+    logger.info("Loaded %d found and %d missing keys checked within %ds; they will not be re-checked",
+                len(known_found), len(known_missing), KNOWN_KEYS_TTL_SEC)
 
-    # Open output files in line-buffered append mode
+    total = 0
+    skipped_found = 0
+    skipped_missing = 0
+    if SAMPLER == "reservoir":
+        stream = iter(reservoir_sample_tiffs(root_dir, N))
+    else:
+        stream = yield_random_tiffs(
+            root_dir,
+            N,
+            max_attempts=max(2000, N * 200),
+            max_depth=MAX_DEPTH,
+            max_scandir_per_dir=MAX_SCANDIR_PER_DIR,
+        )
+
+    # Derive each S3 key once, as paths are sampled; everything downstream gets (local_path, key)
+    keyed_stream: Iterator[Tuple[str, str]] = ((p, key_for_local_path(p)) for p in stream)
+
+    def skip_known(items: Iterator[Tuple[str, str]]) -> Iterator[Tuple[str, str]]:
+        nonlocal skipped_found, skipped_missing
+        for local_path, key in items:
+            if key in known_found:
+                skipped_found += 1
+                continue
+            if key in known_missing:
+                skipped_missing += 1
+                continue
+            yield local_path, key
+
+    if known_found or known_missing:
+        keyed_stream = skip_known(keyed_stream)
+
+    # Open output files in append mode; the background writer batches and flushes them
     with open(FOUND_OUTFILE, "a", encoding="utf-8") as f_found, \
-         open(MISSING_OUTFILE, "a", encoding="utf-8") as f_missing:
-        for idx, local_path in enumerate(stream, start=1):
-            total = idx
-            key = key_for_local_path(local_path)
-            logging.info(f"[{idx}/{N}] Checking S3 existence: s3://{BUCKET_NAME}/{key}")
-            exists, err = check_exists(s3, BUCKET_NAME, key)
+         open(MISSING_OUTFILE, "a", encoding="utf-8") as f_missing, \
+         BackgroundWriter() as writer:
+        def record_result(local_path: str, key: str, exists: bool, err: str) -> None:
+            nonlocal hits, misses, errors
             if exists:
-                logging.info(f"FOUND: s3://{BUCKET_NAME}/{key}")
+                logger.info("FOUND: s3://%s/%s", BUCKET_NAME, key)
                 hits += 1
-                try:
-                    f_found.write(f"{local_path}\t s3://{BUCKET_NAME}/{key}\n")
-                    f_found.flush()
-                except Exception:
-                    pass
+                writer.write(f_found, f"{local_path}\t s3://{BUCKET_NAME}/{key}\t {int(time.time())}\n")
             else:
                 if err.startswith("ClientError") or err.startswith("Not found"):
-                    logging.info(f"MISSING: s3://{BUCKET_NAME}/{key} ({err})")
+                    logger.info("MISSING: s3://%s/%s (%s)", BUCKET_NAME, key, err)
                     misses += 1
                     if len(missing_examples) < 10:
                         missing_examples.append((local_path, key, err))
-                    try:
-                        f_missing.write(f"{local_path}\t s3://{BUCKET_NAME}/{key}\t {err}\n")
-                        f_missing.flush()
-                    except Exception:
-                        pass
+                    writer.write(f_missing,
+                                 f"{local_path}\t s3://{BUCKET_NAME}/{key}\t {err}\t {int(time.time())}\n")
                 else:
-                    logging.warning(f"ERROR: s3://{BUCKET_NAME}/{key} -> {err}")
+                    logger.warning("ERROR: s3://%s/%s -> %s", BUCKET_NAME, key, err)
                     errors += 1
 
-    if total == 0:
-        logging.warning(f"Could not locate any TIFFs under {root_dir} within attempt limits")
+        if USE_ASYNC:
+            total = asyncio.run(verify_stream_async(keyed_stream, endpoint_url, os.getenv('AWS_REGION'),
+                                                    record_result, N, concurrency=ASYNC_CONCURRENCY))
+        else:
+            total = verify_stream_threaded(keyed_stream, s3, record_result, N,
+                                           workers=HEAD_WORKERS, batch_size=CHECK_BATCH_SIZE)
+
+    if total == 0 and skipped_found == 0 and skipped_missing == 0:
+        logger.warning("Could not locate any TIFFs under %s within attempt limits", root_dir)
         return 0
 
     print("")
     print("Verification summary:")
     print(f"  Checked: {total}")
+    print(f"  Skipped (found by a recent run): {skipped_found}")
+    print(f"  Skipped (missing in a recent run): {skipped_missing}")
     print(f"  Found in S3: {hits}")
     print(f"  Missing in S3: {misses}")
     print(f"  Errors: {errors}")
@@ -314,7 +862,7 @@ def main() -> int:
         for lp, k, e in missing_examples:
             print(f"  local={lp} -> s3://{BUCKET_NAME}/{k} :: {e}")
 
-    return 0 if (misses == 0 and errors == 0) else 1
+    return 0 if (misses == 0 and skipped_missing == 0 and errors == 0) else 1
 
 
 if __name__ == "__main__":